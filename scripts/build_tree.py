@@ -7,28 +7,190 @@ Outputs JSON describing the tree structure for visualization.
 """
 
 import json
+import mmap
 import os
-import glob
+import pickle
 import re
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# Sidecar file caching get_session_info results by (mtime, size); bump the
+# version whenever the extracted fields change
+CACHE_FILE = ".tree_cache.json"
+CACHE_VERSION = 7
+
+# Fields every cached session info must carry to be reused
+_CACHED_INFO_KEYS = frozenset((
+    "sessionId", "size", "mtime", "firstPrompt", "firstTimestamp",
+    "lastTimestamp", "messageCount", "userMessages", "version", "name",
+))
+
+# Below this many files to parse, process pool startup costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+# Top-level "timestamp" value of a raw JSONL line, used to skip full parsing
+_TS_RE = re.compile(rb'"timestamp":"([^"]+)"')
+
+# Raw markers for message records; agent progress records embed whole
+# messages, so lines carrying one have to be decoded to know their type
+_USER_MARK = b'"type":"user"'
+_ASSISTANT_MARK = b'"type":"assistant"'
+_PROGRESS_MARK = b'"type":"progress"'
+
+# User messages are kept as previews of this many characters in userMessages
+USER_MESSAGE_CHARS = 200
+
+# User messages after the first only feed those previews, so their text is cut
+# to this many characters before tag stripping
+PROMPT_SCAN_CHARS = 4096
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
 
 
 def strip_xml_tags(text):
     """Remove XML/HTML tags and clean up prompt text for display."""
-    text = re.sub(r"<[^>]+>", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return _WS_RE.sub(" ", _TAG_RE.sub("", text)).strip()
+
+
+def _strip_preview(text):
+    """
+    strip_xml_tags for a userMessages preview, looking at no more than
+    PROMPT_SCAN_CHARS unless the head is mostly whitespace or markup.
+    """
+    if len(text) <= PROMPT_SCAN_CHARS:
+        return strip_xml_tags(text)
+    head = text[:PROMPT_SCAN_CHARS]
+    # Don't leave half a tag at the cut for the tag regex to miss: a "<" after
+    # the last ">" may still close beyond the cut
+    lt = head.find("<", head.rfind(">") + 1)
+    if lt != -1:
+        head = head[:lt]
+    preview = strip_xml_tags(head)
+    if len(preview) < USER_MESSAGE_CHARS:
+        # Too little text survived to fill the preview; the rest may be
+        # further in, so strip the whole message like before
+        return strip_xml_tags(text)
+    return preview
+
+
+def _loads(line):
+    """Decode one JSONL record, retrying with stdlib json for what orjson rejects."""
+    try:
+        return _json.loads(line)
+    except json.JSONDecodeError:
+        if _json is json:
+            raise
+        # orjson refuses lone surrogate escapes (e.g. an emoji cut in half
+        # in tool output) that json accepts
+        return json.loads(line)
+
+
+def _last_timestamp(line):
+    """Pull the trailing timestamp out of a raw JSONL line without parsing it."""
+    i = line.rfind(b'"timestamp":"')
+    if i == -1:
+        return ""
+    m = _TS_RE.match(line, i)
+    return m.group(1).decode() if m else ""
 
 
-def get_session_info(jsonl_path):
-    """Extract key info from a session JSONL file."""
+def _marker_type(line):
+    """
+    Classify a raw JSONL line as a "user" or "assistant" message from its bytes.
+    Returns "" when it holds no message marker, and None when the marker may be
+    nested (several markers, or a progress record) so the line must be decoded.
+    """
+    users = line.count(_USER_MARK)
+    assistants = line.count(_ASSISTANT_MARK)
+    if users + assistants == 0:
+        return ""
+    if users + assistants > 1 or _PROGRESS_MARK in line:
+        return None
+    return "user" if users else "assistant"
+
+
+def _iter_lines(mm, start=0):
+    """Yield each line of a mapped file from offset start as bytes, without the newline."""
+    while (nl := mm.find(b"\n", start)) != -1:
+        yield mm[start:nl]
+        start = nl + 1
+    if start < len(mm):
+        yield mm[start:]
+
+
+def _scan_tail(mm, start, info):
+    """Fill messageCount, lastTimestamp and name from mm[start:], decoding only ambiguous and trailing lines."""
+    if start >= len(mm):
+        return
+
+    # At most one message per line, and only for top-level user/assistant
+    # records; lines with nested markers are decoded to tell
+    for line in _iter_lines(mm, start):
+        kind = _marker_type(line)
+        if kind is None:
+            try:
+                d = _loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+            kind = d.get("type") if isinstance(d, dict) else ""
+        if kind in ("user", "assistant"):
+            info["messageCount"] += 1
+
+    # Walk back from EOF over lines mentioning a timestamp until one has it at
+    # the top level; e.g. file-history-snapshot records only nest one
+    end = len(mm)
+    while (i := mm.rfind(b'"timestamp":"', start, end)) != -1:
+        line_start, line_end = _line_bounds(mm, i, start)
+        end = line_start
+        try:
+            d = _loads(mm[line_start:line_end])
+        except json.JSONDecodeError:
+            continue
+        if isinstance(d, dict) and d.get("timestamp"):
+            info["lastTimestamp"] = d["timestamp"]
+            break
+
+    i = mm.rfind(b'"type":"custom-title"', start)
+    if i != -1:
+        line_start, line_end = _line_bounds(mm, i, start)
+        try:
+            d = _loads(mm[line_start:line_end])
+        except json.JSONDecodeError:
+            return
+        if d.get("customTitle"):
+            info["name"] = d["customTitle"]
+
+
+def _line_bounds(mm, i, start):
+    """Return (begin, end) offsets of the line in mm[start:] containing offset i."""
+    line_start = mm.rfind(b"\n", start, i) + 1 or start
+    line_end = mm.find(b"\n", i)
+    return line_start, line_end if line_end != -1 else len(mm)
+
+
+def get_session_info(jsonl_path, st=None):
+    """Extract key info from a session JSONL file.
+
+    ``st`` is an optional ``os.stat_result`` for the file, so callers that
+    already have one (e.g. from ``os.scandir``) avoid another stat call.
+    """
+    if st is None:
+        st = os.stat(jsonl_path)
     info = {
         "sessionId": os.path.basename(jsonl_path).replace(".jsonl", ""),
         "path": jsonl_path,
-        "size": os.path.getsize(jsonl_path),
-        "mtime": os.path.getmtime(jsonl_path),
+        "size": st.st_size,
+        "mtime": st.st_mtime,
         "firstPrompt": "",
         "firstTimestamp": "",
         "lastTimestamp": "",
@@ -38,14 +200,30 @@ def get_session_info(jsonl_path):
         "name": "",
     }
 
-    user_msg_count = 0
     first_3_user_texts = []
 
     try:
-        with open(jsonl_path) as f:
-            for line in f:
+        with open(jsonl_path, "rb") as fh:
+            if st.st_size == 0:
+                return info  # mmap cannot map an empty file
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        with mm:
+            pos = 0  # offset just past the current line
+            for line in _iter_lines(mm):
+                pos += len(line) + 1
+
+                # Assistant turns are only counted, so once the one-shot
+                # fields are filled skip decoding their (often huge) content
+                if (info["firstPrompt"] and info["version"]
+                        and _marker_type(line) == "assistant"):
+                    info["messageCount"] += 1
+                    ts = _last_timestamp(line)
+                    if ts:
+                        info["lastTimestamp"] = ts
+                    continue
+
                 try:
-                    d = json.loads(line.strip())
+                    d = _loads(line.strip())
                 except json.JSONDecodeError:
                     continue
 
@@ -58,7 +236,8 @@ def get_session_info(jsonl_path):
                         info["firstTimestamp"] = ts
                     info["lastTimestamp"] = ts
 
-                if d.get("type") == "user":
+                msg_type = d.get("type")
+                if msg_type == "user":
                     info["messageCount"] += 1
                     content = d.get("message", {}).get("content", "")
                     text = ""
@@ -67,21 +246,34 @@ def get_session_info(jsonl_path):
                     elif isinstance(content, str):
                         text = content
 
-                    text = strip_xml_tags(text)
-
-                    if not info["firstPrompt"] and text.strip():
-                        info["firstPrompt"] = text.strip()
-
-                    if len(first_3_user_texts) < 3 and text.strip():
-                        first_3_user_texts.append(text.strip()[:200])
-
-                elif d.get("type") == "assistant":
+                    # firstPrompt drives fork grouping and --filter, so it is
+                    # kept whole; later texts only feed the 200-char
+                    # userMessages, and pasted logs there can be megabytes.
+                    if info["firstPrompt"]:
+                        text = _strip_preview(text)
+                    else:
+                        text = strip_xml_tags(text)
+
+                    if text:
+                        if not info["firstPrompt"]:
+                            info["firstPrompt"] = text
+                        if len(first_3_user_texts) < 3:
+                            first_3_user_texts.append(text[:USER_MESSAGE_CHARS])
+
+                elif msg_type == "assistant":
                     info["messageCount"] += 1
 
                 # Check for custom title (set by /rename)
-                if d.get("type") == "custom-title" and d.get("customTitle"):
+                elif msg_type == "custom-title" and d.get("customTitle"):
                     info["name"] = d["customTitle"]
 
+                if info["version"] and info["firstPrompt"] and len(first_3_user_texts) >= 3:
+                    break
+
+            # The rest of the file only feeds messageCount, lastTimestamp
+            # and a possible later /rename, which can be read off the raw bytes
+            _scan_tail(mm, pos, info)
+
     except Exception as e:
         pass
 
@@ -103,6 +295,7 @@ def detect_forks(sessions):
 
     # For groups with multiple sessions, the earliest is the root
     edges = []  # (parent_id, child_id)
+    child_set = set()
     roots = set()
 
     for prompt, group in by_prompt.items():
@@ -122,18 +315,19 @@ def detect_forks(sessions):
         chain = [root]
         for fork in forks:
             edges.append((chain[-1]["sessionId"], fork["sessionId"]))
+            child_set.add(fork["sessionId"])
             chain.append(fork)
 
-    # Sessions with unique prompts are standalone roots
+    # Sessions without a prompt are standalone roots
     for s in sessions:
-        if s["sessionId"] not in roots and not any(
-            c == s["sessionId"] for _, c in edges
-        ):
-            roots.add(s["sessionId"])
+        sid = s["sessionId"]
+        if sid not in roots and sid not in child_set:
+            roots.add(sid)
 
     return edges, roots
 
 
+@lru_cache(maxsize=4096)
 def format_timestamp(ts_str):
     """Format ISO timestamp to readable form."""
     if not ts_str:
@@ -145,6 +339,63 @@ def format_timestamp(ts_str):
         return ts_str[:16]
 
 
+def _load_cache(cache_path):
+    """Load cached session info keyed by session id, or {} if unusable."""
+    try:
+        with open(cache_path, "rb") as f:
+            data = _loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    sessions = data.get("sessions")
+    if not isinstance(sessions, dict):
+        return {}
+    # Drop malformed entries so they are simply re-parsed as cache misses
+    return {sid: entry for sid, entry in sessions.items() if _valid_cache_entry(sid, entry)}
+
+
+def _valid_cache_entry(sid, entry):
+    if not isinstance(entry, dict):
+        return False
+    info = entry.get("info")
+    return (isinstance(entry.get("mtime"), (int, float))
+            and isinstance(entry.get("size"), int)
+            and isinstance(info, dict)
+            and _CACHED_INFO_KEYS <= info.keys()
+            and info["sessionId"] == sid)
+
+
+def _save_cache(cache_path, sessions):
+    """Atomically write the session info cache; failures are non-fatal."""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "sessions": sessions}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _parse_sessions(paths, stats):
+    """Run get_session_info over many files, in parallel when worth it."""
+    workers = min(len(paths), os.cpu_count() or 1)
+    if len(paths) >= PARALLEL_MIN_FILES and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                return list(ex.map(get_session_info, paths, stats, chunksize=4))
+        except (OSError, NotImplementedError, BrokenProcessPool,
+                pickle.PicklingError, AttributeError, ImportError):
+            # No usable process pool here, or get_session_info cannot be
+            # sent to workers (e.g. this module was loaded under a name they
+            # cannot import); fall back to a serial parse
+            pass
+    return [get_session_info(p, st) for p, st in zip(paths, stats)]
+
+
 def build_tree_json(project_path=None):
     """Build the full session tree for a project."""
     if not project_path:
@@ -153,14 +404,47 @@ def build_tree_json(project_path=None):
         encoded = re.sub(r"[/.]", "-", cwd)
         project_path = os.path.expanduser(f"~/.claude/projects/{encoded}/")
 
-    jsonl_files = glob.glob(os.path.join(project_path, "*.jsonl"))
+    try:
+        with os.scandir(project_path) as it:
+            entries = [e for e in it if e.name.endswith(".jsonl") and not e.name.startswith(".")]
+    except OSError:
+        entries = []
+
+    cache_path = os.path.join(project_path, CACHE_FILE)
+    cache = _load_cache(cache_path)
+    new_cache = {}
+
+    infos = []
+    stale = []  # (index into infos, path, stat) for files that need parsing
+    for e in entries:
+        sid = e.name[:-len(".jsonl")]
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        entry = cache.get(sid)
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            info = entry["info"]
+            info["path"] = e.path
+        else:
+            info = None
+            stale.append((len(infos), e.path, st))
+        infos.append(info)
+
+    if stale:
+        _, paths, stats = zip(*stale)
+        for (i, _, _), info in zip(stale, _parse_sessions(paths, stats)):
+            infos[i] = info
 
     sessions = []
-    for f in jsonl_files:
-        info = get_session_info(f)
+    for info in infos:
+        new_cache[info["sessionId"]] = {"mtime": info["mtime"], "size": info["size"], "info": info}
         if info["messageCount"] > 0:  # Skip empty sessions
             sessions.append(info)
 
+    if new_cache != cache:
+        _save_cache(cache_path, new_cache)
+
     # Sort by creation time
     sessions.sort(key=lambda x: x["firstTimestamp"])
 
@@ -173,6 +457,10 @@ def build_tree_json(project_path=None):
 
     session_map = {s["sessionId"]: s for s in sessions}
 
+    # Sort children once here so traversals never have to
+    for child_ids in children.values():
+        child_ids.sort(key=lambda c: session_map[c]["firstTimestamp"] or "")
+
     return {
         "sessions": session_map,
         "edges": edges,
@@ -181,21 +469,63 @@ def build_tree_json(project_path=None):
     }
 
 
-def print_ascii_tree(tree_data, max_depth=None):
-    """Print an ASCII tree representation."""
+def build_index(tree_data):
+    """
+    Flatten the tree into parallel per-session lists addressed by int index,
+    so traversals avoid nested dict lookups on every node.
+    """
     session_map = tree_data["sessions"]
     children = tree_data["children"]
-    roots = tree_data["roots"]
 
-    def print_node(sid, prefix="", is_last=True, depth=0):
+    sids = list(session_map)
+    sid_to_idx = {sid: i for i, sid in enumerate(sids)}
+    ts_arr = []
+    msg_arr = []
+    name_arr = []
+    prompt_arr = []
+    for s in session_map.values():
+        ts_arr.append(s.get("firstTimestamp", ""))
+        msg_arr.append(s.get("messageCount", 0))
+        name_arr.append(s.get("name", ""))
+        prompt_arr.append(s.get("firstPrompt", ""))
+
+    children_idx_arr = []
+    for sid in sids:
+        children_idx_arr.append([sid_to_idx[c] for c in children.get(sid, []) if c in sid_to_idx])
+
+    return {
+        "sids": sids,
+        "sid_to_idx": sid_to_idx,
+        "ts": ts_arr,
+        "msgs": msg_arr,
+        "names": name_arr,
+        "prompts": prompt_arr,
+        "children": children_idx_arr,
+        "roots": [sid_to_idx[r] for r in tree_data["roots"] if r in sid_to_idx],
+    }
+
+
+def print_ascii_tree(tree_data, max_depth=None):
+    """Print an ASCII tree representation."""
+    index = build_index(tree_data)
+    ts_arr = index["ts"]
+    msg_arr = index["msgs"]
+    name_arr = index["names"]
+    prompt_arr = index["prompts"]
+    children_idx_arr = index["children"]
+    roots = index["roots"]
+
+    # Explicit stack of (idx, prefix, is_last, depth) so deep fork chains
+    # cannot hit the recursion limit
+    stack = [(root, "", i == len(roots) - 1, 0) for i, root in reversed(list(enumerate(roots)))]
+    while stack:
+        idx, prefix, is_last, depth = stack.pop()
         if max_depth is not None and depth > max_depth:
-            return
-        s = session_map.get(sid, {})
+            continue
         connector = "└── " if is_last else "├── "
-        raw_name = s.get("name") or s.get("firstPrompt", "") or "(no prompt)"
-        name = raw_name
-        ts = format_timestamp(s.get("firstTimestamp", ""))
-        msgs = s.get("messageCount", 0)
+        name = name_arr[idx] or prompt_arr[idx] or "(no prompt)"
+        ts = format_timestamp(ts_arr[idx])
+        msgs = msg_arr[idx]
 
         # Truncate name so the line fits in ~100 chars
         meta = f"{prefix}{connector}{ts} ({msgs} msgs) "
@@ -205,21 +535,18 @@ def print_ascii_tree(tree_data, max_depth=None):
 
         print(f"{prefix}{connector}{ts} ({msgs} msgs) {name}")
 
-        child_ids = children.get(sid, [])
-        child_ids.sort(key=lambda c: session_map.get(c, {}).get("firstTimestamp", ""))
+        child_ids = children_idx_arr[idx]
+        new_prefix = prefix + ("    " if is_last else "│   ")
 
         if max_depth is not None and depth + 1 > max_depth and child_ids:
-            new_prefix = prefix + ("    " if is_last else "│   ")
             print(f"{new_prefix}└── ... {len(child_ids)} fork(s)")
-            return
-
-        new_prefix = prefix + ("    " if is_last else "│   ")
-        for i, child in enumerate(child_ids):
-            print_node(child, new_prefix, i == len(child_ids) - 1, depth + 1)
+            continue
 
-    for i, root in enumerate(roots):
-        is_last_root = i == len(roots) - 1
-        print_node(root, "", is_last_root, depth=0)
+        last = len(child_ids) - 1
+        stack.extend(
+            (child, new_prefix, i == last, depth + 1)
+            for i, child in reversed(list(enumerate(child_ids)))
+        )
 
     print()
     print("Resume: claude --resume \"<keyword>\"")
@@ -249,13 +576,15 @@ if __name__ == "__main__":
                 break
         if match:
             # Collect this node and all its descendants
-            def collect_subtree(sid):
-                result = {sid}
-                for child in tree["children"].get(sid, []):
-                    result |= collect_subtree(child)
-                return result
+            keep = set()
+            dq = deque([match])
+            while dq:
+                sid = dq.popleft()
+                if sid in keep:
+                    continue
+                keep.add(sid)
+                dq.extend(tree["children"].get(sid, []))
 
-            keep = collect_subtree(match)
             tree["roots"] = [match]
             tree["children"] = {k: v for k, v in tree["children"].items() if k in keep}
             tree["sessions"] = {k: v for k, v in tree["sessions"].items() if k in keep}
@@ -268,15 +597,25 @@ if __name__ == "__main__":
         from interactive_tree import run
         run(args.project_path)
     elif args.json:
+        # path is local-only and nothing reads the sessions after this, so
+        # drop it in place rather than copying every session dict
+        for s in tree["sessions"].values():
+            s.pop("path", None)
         output = {
             "edges": tree["edges"],
             "roots": tree["roots"],
             "children": tree["children"],
-            "sessions": {
-                sid: {k: v for k, v in s.items() if k != "path"}
-                for sid, s in tree["sessions"].items()
-            },
+            "sessions": tree["sessions"],
         }
-        print(json.dumps(output, indent=2))
+        out_bytes = None
+        if hasattr(_json, "OPT_INDENT_2"):  # orjson
+            try:
+                out_bytes = _json.dumps(output, option=_json.OPT_INDENT_2)
+            except TypeError:
+                pass  # e.g. lone surrogates that _loads recovered via stdlib json
+        if out_bytes is None:
+            print(json.dumps(output, indent=2))
+        else:
+            sys.stdout.buffer.write(out_bytes + b"\n")
     else:
         print_ascii_tree(tree, max_depth=args.depth)
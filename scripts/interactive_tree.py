@@ -10,29 +10,27 @@ import os
 import sys
 
 sys.path.insert(0, os.path.dirname(__file__))
-from build_tree import build_tree_json, format_timestamp
+from build_tree import build_index, build_tree_json, format_timestamp
 
 
 def build_full_rows(tree_data):
     """Build full flat list of all rows with parent info."""
-    session_map = tree_data["sessions"]
-    children = tree_data["children"]
-    roots = tree_data["roots"]
+    index = build_index(tree_data)
+    sids = index["sids"]
+    ts_arr = index["ts"]
+    msg_arr = index["msgs"]
+    name_arr = index["names"]
+    prompt_arr = index["prompts"]
+    children_idx_arr = index["children"]
     rows = []
 
-    def walk(sid, depth=0):
-        s = session_map.get(sid, {})
-        name = s.get("name") or s.get("firstPrompt", "")[:60] or "(no prompt)"
-        ts = format_timestamp(s.get("firstTimestamp", ""))
-        msgs = s.get("messageCount", 0)
-        child_ids = children.get(sid, [])
-        child_ids.sort(key=lambda c: session_map.get(c, {}).get("firstTimestamp", ""))
-        rows.append((depth, ts, msgs, name, sid, child_ids))
-        for child in child_ids:
-            walk(child, depth + 1)
-
-    for root in roots:
-        walk(root)
+    stack = [(root, 0) for root in reversed(index["roots"])]
+    while stack:
+        idx, depth = stack.pop()
+        name = name_arr[idx] or prompt_arr[idx][:60] or "(no prompt)"
+        child_ids = children_idx_arr[idx]
+        rows.append((depth, format_timestamp(ts_arr[idx]), msg_arr[idx], name, sids[idx], child_ids))
+        stack.extend((child, depth + 1) for child in reversed(child_ids))
 
     return rows
 
@@ -57,20 +55,56 @@ def get_visible_rows(all_rows, collapsed):
     return visible
 
 
+def filter_rows(rows, lower_names, filter_text):
+    """Keep rows whose name contains filter_text, case-insensitively."""
+    q = filter_text.lower()
+    return [r for r in rows if q in lower_names[r[4]]]
+
+
+def _subtree_end(all_rows, i):
+    """Index just past the last descendant of all_rows[i]."""
+    depth = all_rows[i][0]
+    j = i + 1
+    while j < len(all_rows) and all_rows[j][0] > depth:
+        j += 1
+    return j
+
+
+def collapse_row(rows, pos):
+    """Collapse visible row at pos in place, dropping its visible descendants."""
+    depth, ts, msgs, name, sid, has_children, _ = rows[pos]
+    end = pos + 1
+    while end < len(rows) and rows[end][0] > depth:
+        end += 1
+    del rows[pos + 1:end]
+    rows[pos] = (depth, ts, msgs, name, sid, has_children, True)
+
+
+def expand_row(rows, pos, all_rows, all_pos, collapsed):
+    """Expand visible row at pos in place, splicing in its visible descendants."""
+    depth, ts, msgs, name, sid, has_children, _ = rows[pos]
+    i = all_pos[sid]
+    rows[pos] = (depth, ts, msgs, name, sid, has_children, False)
+    rows[pos + 1:pos + 1] = get_visible_rows(all_rows[i + 1:_subtree_end(all_rows, i)], collapsed)
+
+
+def _fill_line(stdscr, y, text, width, attr):
+    """Draw text on row y with attr applied across the full width, without padding the string."""
+    stdscr.addnstr(y, 0, text, width - 1, attr)
+    stdscr.clrtoeol()
+    stdscr.chgat(y, 0, width - 1, attr)
+
+
 def draw_tree(stdscr, rows, selected, scroll_offset, filter_text=None):
     stdscr.clear()
     height, width = stdscr.getmaxyx()
 
     header = " SESSION TREE  (↑↓ navigate | ←→ collapse/expand | Enter resume | / search | q quit)"
-    stdscr.attron(curses.color_pair(3))
-    stdscr.addnstr(0, 0, header.ljust(width), width - 1)
-    stdscr.attroff(curses.color_pair(3))
+    _fill_line(stdscr, 0, header, width, curses.color_pair(3))
 
     if filter_text is not None:
         filter_line = f" Filter: {filter_text}█"
-        stdscr.attron(curses.color_pair(4))
-        stdscr.addnstr(1, 0, filter_line.ljust(width), width - 1)
-        stdscr.attroff(curses.color_pair(4))
+        _fill_line(stdscr, 1, filter_line, width, curses.color_pair(4))
         content_start = 2
     else:
         content_start = 1
@@ -80,40 +114,48 @@ def draw_tree(stdscr, rows, selected, scroll_offset, filter_text=None):
         row_idx = i + scroll_offset
         if row_idx >= len(rows):
             break
+        _draw_row(stdscr, i + content_start, rows[row_idx], width, row_idx == selected)
 
-        depth, ts, msgs, name, sid, has_children, is_collapsed = rows[row_idx]
-
-        indent = "  " * depth
-        if has_children:
-            marker = "▸ " if is_collapsed else "▾ "
-        else:
-            marker = "  "
-
-        meta = f"{indent}{marker}{ts} ({msgs}) "
-        max_name = max(10, width - len(meta) - 2)
-        display_name = name[:max_name - 1] + "…" if len(name) > max_name else name
-        line = f"{indent}{marker}{ts} ({msgs}) {display_name}"
-
-        y = i + content_start
-        if row_idx == selected:
-            stdscr.attron(curses.color_pair(1))
-            stdscr.addnstr(y, 0, line.ljust(width - 1), width - 1)
-            stdscr.attroff(curses.color_pair(1))
-        elif has_children:
-            stdscr.attron(curses.color_pair(2))
-            stdscr.addnstr(y, 0, line, width - 1)
-            stdscr.attroff(curses.color_pair(2))
-        else:
-            stdscr.addnstr(y, 0, line, width - 1)
+    _draw_footer(stdscr, rows, selected, height, width)
+    stdscr.refresh()
 
+
+def draw_selection(stdscr, rows, prev_selected, selected, scroll_offset, content_start):
+    """Redraw only the rows whose highlight changed, plus the footer."""
+    height, width = stdscr.getmaxyx()
+    for row_idx in (prev_selected, selected):
+        if 0 <= row_idx < len(rows):
+            _draw_row(stdscr, row_idx - scroll_offset + content_start, rows[row_idx], width, row_idx == selected)
+    _draw_footer(stdscr, rows, selected, height, width)
+    stdscr.refresh()
+
+
+def _draw_row(stdscr, y, row, width, is_selected):
+    depth, ts, msgs, name, sid, has_children, is_collapsed = row
+
+    indent = "  " * depth
+    if has_children:
+        marker = "▸ " if is_collapsed else "▾ "
+    else:
+        marker = "  "
+
+    meta = f"{indent}{marker}{ts} ({msgs}) "
+    max_name = max(10, width - len(meta) - 2)
+    display_name = name[:max_name - 1] + "…" if len(name) > max_name else name
+    line = f"{indent}{marker}{ts} ({msgs}) {display_name}"
+
+    if is_selected:
+        _fill_line(stdscr, y, line, width, curses.color_pair(1))
+    else:
+        stdscr.addnstr(y, 0, line, width - 1, curses.color_pair(2) if has_children else curses.A_NORMAL)
+        stdscr.clrtoeol()
+
+
+def _draw_footer(stdscr, rows, selected, height, width):
     if rows:
         _, _, _, _, sid, _, _ = rows[selected]
         footer = f" {sid}"
-        stdscr.attron(curses.color_pair(3))
-        stdscr.addnstr(height - 1, 0, footer.ljust(width), width - 1)
-        stdscr.attroff(curses.color_pair(3))
-
-    stdscr.refresh()
+        _fill_line(stdscr, height - 1, footer, width, curses.color_pair(3))
 
 
 def main(stdscr, project_path):
@@ -132,11 +174,19 @@ def main(stdscr, project_path):
         stdscr.getch()
         return None
 
+    all_pos = {row[4]: i for i, row in enumerate(all_rows)}
+    # Lowercased names for / search, computed once rather than per keystroke
+    lower_names = {row[4]: row[3].lower() for row in all_rows}
     collapsed = set()
     rows = get_visible_rows(all_rows, collapsed)
+    # Collapse/expand edit rows in place only while it is the unfiltered view
+    rows_filtered = False
     selected = 0
     scroll_offset = 0
     filter_text = None
+    needs_full_redraw = True
+    prev_view = None
+    prev_selected = selected
 
     while True:
         height, width = stdscr.getmaxyx()
@@ -148,30 +198,44 @@ def main(stdscr, project_path):
         if selected >= scroll_offset + visible:
             scroll_offset = selected - visible + 1
 
-        draw_tree(stdscr, rows, selected, scroll_offset, filter_text)
+        # Plain cursor moves within the same view only touch two rows
+        view = (scroll_offset, filter_text, height, width)
+        if needs_full_redraw or view != prev_view:
+            draw_tree(stdscr, rows, selected, scroll_offset, filter_text)
+        elif selected != prev_selected:
+            draw_selection(stdscr, rows, prev_selected, selected, scroll_offset, content_start)
+        needs_full_redraw = False
+        prev_view = view
+        prev_selected = selected
+
         key = stdscr.getch()
 
         if filter_text is not None:
+            needs_full_redraw = True
             if key == 27:
                 filter_text = None
                 rows = get_visible_rows(all_rows, collapsed)
+                rows_filtered = False
                 selected = 0
                 scroll_offset = 0
             elif key in (curses.KEY_BACKSPACE, 127, 8):
                 filter_text = filter_text[:-1]
                 if not filter_text:
                     rows = get_visible_rows(all_rows, collapsed)
+                    rows_filtered = False
                 else:
-                    base = get_visible_rows(all_rows, collapsed)
-                    rows = [r for r in base if filter_text.lower() in r[3].lower()]
+                    rows = filter_rows(get_visible_rows(all_rows, collapsed), lower_names, filter_text)
+                    rows_filtered = True
                 selected = min(selected, max(0, len(rows) - 1))
                 scroll_offset = 0
             elif key == 10:
                 filter_text = None
             elif 32 <= key <= 126:
                 filter_text += chr(key)
-                base = get_visible_rows(all_rows, collapsed)
-                rows = [r for r in base if filter_text.lower() in r[3].lower()]
+                # Extending a non-empty query can only narrow the current matches
+                base = rows if len(filter_text) > 1 else get_visible_rows(all_rows, collapsed)
+                rows = filter_rows(base, lower_names, filter_text)
+                rows_filtered = True
                 selected = min(selected, max(0, len(rows) - 1))
                 scroll_offset = 0
             continue
@@ -189,7 +253,12 @@ def main(stdscr, project_path):
                 _, _, _, _, sid, has_children, is_collapsed = rows[selected]
                 if has_children and not is_collapsed:
                     collapsed.add(sid)
-                    rows = get_visible_rows(all_rows, collapsed)
+                    if rows_filtered:
+                        rows = get_visible_rows(all_rows, collapsed)
+                        rows_filtered = False
+                    else:
+                        collapse_row(rows, selected)
+                    needs_full_redraw = True
                     selected = min(selected, len(rows) - 1)
                 else:
                     # Jump to parent (find nearest row with lower depth)
@@ -204,7 +273,12 @@ def main(stdscr, project_path):
                 _, _, _, _, sid, has_children, is_collapsed = rows[selected]
                 if has_children and is_collapsed:
                     collapsed.discard(sid)
-                    rows = get_visible_rows(all_rows, collapsed)
+                    if rows_filtered:
+                        rows = get_visible_rows(all_rows, collapsed)
+                        rows_filtered = False
+                    else:
+                        expand_row(rows, selected, all_rows, all_pos, collapsed)
+                    needs_full_redraw = True
         elif key == curses.KEY_PPAGE:
             selected = max(0, selected - visible)
         elif key == curses.KEY_NPAGE: